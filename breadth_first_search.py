@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class breadth_first_search:
     '''
     Callable class that is instantiated on a graph.
@@ -11,15 +14,21 @@ class breadth_first_search:
                         be 'unexplored', 'exploring' and 'explored'.
                [has_cycle]: boolean to indicate if the algorithm
                             discovered that the graph has a cycle
-                [queue]: a list that we manipulate as a queue that holds the
-                         unexplored neighbors of each node
+                [queue]: a deque that holds the discovered vertices
+                         whose neighbors are not examined yet
+                [depth]: mapping of discovered vertices to their
+                         hop distance from the start vertex
                [breadth_traversal]: a list that that holds the edges
                         of the resulting breadth first traversal (DFS tree)
         '''
         self.state = {vertex: 'unexplored' for vertex in G.vertices()}
         self.has_cycle = False
-        self.queue = []
+        self.queue = deque()
+        self.depth = {}
         self.breadth_traversal = []
+        # vertex whose neighbors are being examined and
+        # the iterator over its remaining edges
+        self._expanding = None
 
     def __call__(self, G, start):
         '''
@@ -28,17 +37,57 @@ class breadth_first_search:
         As long as the queue is not empty, pop the first neighbor and
         do as above.
         '''
-        self.queue.append(start)
-        self.state[start] = 'exploring'
-        while self.queue:
-            vertex = self.queue.pop(0)
-            self.state[vertex] = 'explored'
-            for edge in G.incident_edges(vertex):
+        for vertex, edge in self.traverse(G, start):
+            if edge is not None:
+                self.breadth_traversal.append(edge)
+
+    def traverse(self, G, start=None, max_depth=None,
+                 on_vertex=None, on_edge=None):
+        '''
+        Generator of the breadth first traversal. Yields (vertex, edge)
+        as each vertex is discovered, where edge is the edge of the
+        traversal tree it was discovered through (None for start).
+        The traversal state is kept in the instance: if the generator is
+        abandoned, a new call with start=None resumes the traversal where
+        it stopped without examining any edge twice. Passing another
+        unexplored start vertex continues into its component as well.
+
+        [max_depth]: vertices at this hop distance from start are not
+                     expanded. A later call with a larger (or no) limit
+                     resumes from them.
+        [on_vertex]: callback on each discovered vertex
+        [on_edge]: callback on each edge of the traversal tree
+        '''
+        if start is not None and self.state[start] == 'unexplored':
+            self.state[start] = 'exploring'
+            self.depth[start] = 0
+            self.queue.append(start)
+            if on_vertex is not None:
+                on_vertex(start)
+            yield start, None
+
+        while self.queue or self._expanding is not None:
+            if self._expanding is None:
+                vertex = self.queue[0]
+                if max_depth is not None and self.depth[vertex] >= max_depth:
+                    # the rest of the queue is as deep
+                    return
+                self.queue.popleft()
+                self.state[vertex] = 'explored'
+                self._expanding = (vertex, G.incident_edges(vertex))
+            vertex, edges = self._expanding
+            for edge in edges:
                 neighbor = edge.opposite(vertex)
                 if self.state[neighbor] == 'unexplored':
-                    self.breadth_traversal.append(edge)
-                    self.queue.append(neighbor)
                     self.state[neighbor] = 'exploring'
+                    self.depth[neighbor] = self.depth[vertex] + 1
+                    self.queue.append(neighbor)
+                    if on_edge is not None:
+                        on_edge(edge)
+                    if on_vertex is not None:
+                        on_vertex(neighbor)
+                    yield neighbor, edge
                 else:
                     if self.state[neighbor] == 'exploring':
                         self.has_cycle = True
+            self._expanding = None
@@ -0,0 +1,239 @@
+import concurrent.futures
+import heapq
+import random
+from array import array
+from collections import deque
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _export_arrays(G, outgoing=True, w=None):
+    '''
+    Export the adjacency of G to compact arrays indexed by vertex position.
+    Returns (vertices, indptr, indices, weights) where the neighbors of
+    vertices[i] (outgoing or, if outgoing=False, incoming ones) are
+    indices[indptr[i]:indptr[i+1]] and weights holds the corresponding
+    edge weights of the mapping w (None if w is None).
+    '''
+    vertices = list(G.vertices())
+    position = {vertex: i for i, vertex in enumerate(vertices)}
+    indptr = array('q', [0])
+    indices = array('q')
+    weights = None if w is None else array('d')
+    for vertex in vertices:
+        for edge in G.incident_edges(vertex, outgoing=outgoing):
+            indices.append(position[edge.opposite(vertex)])
+            if w is not None:
+                weights.append(w[edge])
+        indptr.append(len(indices))
+    return vertices, indptr, indices, weights
+
+
+def pagerank(G, damping=0.85, tol=1.0e-6, max_iter=100, use_numpy=None):
+    '''
+    PageRank of the vertices of G computed by power iteration.
+    The rank of vertices without outgoing edges is spread over all vertices.
+
+    Inputs:
+    [G]: graph.Graph object, undirected edges count in both directions
+    [damping]: probability of following an edge instead of jumping
+               to a random vertex
+    [tol]: the iteration stops when the sum of the absolute changes of
+           the ranks is below n*tol
+    [max_iter]: maximum number of iterations
+    [use_numpy]: use the vectorized NumPy iteration. Defaults to True
+                 if NumPy is available.
+
+    Output:
+    mapping of vertices to their rank, ranks sum up to 1
+    '''
+    vertices, indptr, indices, _ = _export_arrays(G, outgoing=False)
+    n = len(vertices)
+    if n == 0:
+        return {}
+    out_degree = [G.degree(vertex) for vertex in vertices]
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    if use_numpy:
+        rank = _pagerank_numpy(indptr, indices, out_degree,
+                               damping, tol, max_iter)
+    else:
+        rank = _pagerank_python(indptr, indices, out_degree,
+                                damping, tol, max_iter)
+    return {vertex: rank[i] for i, vertex in enumerate(vertices)}
+
+
+def _pagerank_python(indptr, indices, out_degree, damping, tol, max_iter):
+    n = len(out_degree)
+    dangling = [i for i in range(n) if out_degree[i] == 0]
+    rank = [1.0 / n] * n
+    for _ in range(max_iter):
+        jump = (1.0 - damping + damping * sum(rank[i] for i in dangling)) / n
+        share = [rank[i] / out_degree[i] if out_degree[i] else 0.0
+                 for i in range(n)]
+        new_rank = [jump + damping * sum(share[j] for j in
+                                         indices[indptr[i]:indptr[i + 1]])
+                    for i in range(n)]
+        error = sum(abs(new_rank[i] - rank[i]) for i in range(n))
+        rank = new_rank
+        if error < n * tol:
+            break
+    return rank
+
+
+def _pagerank_numpy(indptr, indices, out_degree, damping, tol, max_iter):
+    n = len(out_degree)
+    indptr = numpy.frombuffer(indptr, dtype=numpy.int64)
+    sources = numpy.frombuffer(indices, dtype=numpy.int64)
+    # row (destination) of every entry of the incoming adjacency
+    targets = numpy.repeat(numpy.arange(n), numpy.diff(indptr))
+    out_degree = numpy.array(out_degree, dtype=float)
+    dangling = out_degree == 0
+    inverse_degree = numpy.divide(1.0, out_degree,
+                                  out=numpy.zeros(n), where=~dangling)
+    rank = numpy.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        jump = (1.0 - damping + damping * rank[dangling].sum()) / n
+        share = rank * inverse_degree
+        new_rank = jump + damping * numpy.bincount(
+            targets, weights=share[sources], minlength=n)
+        error = numpy.abs(new_rank - rank).sum()
+        rank = new_rank
+        if error < n * tol:
+            break
+    return rank.tolist()
+
+
+def _dependencies(arrays, sources):
+    '''
+    Brandes accumulation of the pair dependencies of the given sources.
+    [arrays]: (n, indptr, indices, weights) of the outgoing adjacency.
+              Breadth first search is used when weights is None,
+              else Dijkstra's algorithm.
+    Returns the list of the accumulated betweenness of each vertex.
+    '''
+    n, indptr, indices, weights = arrays
+    betweenness = [0.0] * n
+    for s in sources:
+        order = []  # vertices in non-decreasing distance from s
+        predecessors = [[] for _ in range(n)]
+        sigma = [0] * n  # count of shortest paths from s
+        sigma[s] = 1
+        if weights is None:
+            distance = [-1] * n
+            distance[s] = 0
+            queue = deque([s])
+            while queue:
+                v = queue.popleft()
+                order.append(v)
+                for k in range(indptr[v], indptr[v + 1]):
+                    x = indices[k]
+                    if distance[x] < 0:
+                        distance[x] = distance[v] + 1
+                        queue.append(x)
+                    if distance[x] == distance[v] + 1:
+                        sigma[x] += sigma[v]
+                        predecessors[x].append(v)
+        else:
+            tentative = {s: 0}
+            done = [False] * n
+            heap = [(0, s)]
+            while heap:
+                d, v = heapq.heappop(heap)
+                if done[v]:
+                    continue
+                done[v] = True
+                order.append(v)
+                for k in range(indptr[v], indptr[v + 1]):
+                    x = indices[k]
+                    if done[x]:
+                        continue
+                    candidate = d + weights[k]
+                    if x not in tentative or candidate < tentative[x]:
+                        tentative[x] = candidate
+                        sigma[x] = sigma[v]
+                        predecessors[x] = [v]
+                        heapq.heappush(heap, (candidate, x))
+                    elif candidate == tentative[x]:
+                        sigma[x] += sigma[v]
+                        predecessors[x].append(v)
+
+        delta = [0.0] * n
+        while order:
+            x = order.pop()
+            for v in predecessors[x]:
+                delta[v] += sigma[v] / sigma[x] * (1.0 + delta[x])
+            if x != s:
+                betweenness[x] += delta[x]
+    return betweenness
+
+
+def betweenness_centrality(G, w=None, normalized=True, processes=None,
+                           samples=None, seed=None):
+    '''
+    Betweenness centrality of the vertices of G with Brandes' algorithm.
+
+    Inputs:
+    [G]: graph.Graph object
+    [w]: optional weight mapping of edges with positive weights.
+         If not given every edge has length 1.
+    [normalized]: divide by the number of vertex pairs not including v
+    [processes]: if more than 1, the sources are split over
+                 a process pool of this size
+    [samples]: if given, approximate the centrality from this many
+               randomly chosen sources, scaled up to all n sources
+    [seed]: seed of the source sampling
+
+    Output:
+    mapping of vertices to their betweenness centrality
+    '''
+    vertices, indptr, indices, weights = _export_arrays(G, w=w)
+    n = len(vertices)
+    arrays = (n, indptr, indices, weights)
+
+    sources = list(range(n))
+    if samples is not None and samples < n:
+        sources = random.Random(seed).sample(sources, samples)
+
+    if processes is not None and processes > 1 and len(sources) > 1:
+        chunk_count = min(len(sources), processes * 4)
+        chunks = [sources[i::chunk_count] for i in range(chunk_count)]
+        betweenness = [0.0] * n
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            for partial in executor.map(_dependencies,
+                                        [arrays] * chunk_count, chunks):
+                for i in range(n):
+                    betweenness[i] += partial[i]
+    else:
+        betweenness = _dependencies(arrays, sources)
+
+    scale = 1.0
+    if sources and len(sources) < n:
+        scale = n / len(sources)
+    if normalized:
+        if n > 2:
+            scale = scale / ((n - 1) * (n - 2))
+    elif not G.is_directed():
+        # every unordered pair was counted from both of its ends
+        scale = scale / 2
+    return {vertex: betweenness[i] * scale
+            for i, vertex in enumerate(vertices)}
+
+
+if __name__ == '__main__':
+    import graph
+
+    E = [('a', 'b'), ('b', 'c'), ('c', 'a'), ('c', 'd'),
+         ('d', 'e'), ('e', 'f'), ('f', 'd')]
+    G, weight_mapping = graph.create_graph(E, is_directed=True)
+    print('Directed graph')
+    print(E)
+    print('PageRank:')
+    for vertex, rank in pagerank(G).items():
+        print(vertex.element() + ': ' + str(round(rank, 4)))
+    print('Betweenness centrality:')
+    for vertex, value in betweenness_centrality(G).items():
+        print(vertex.element() + ': ' + str(round(value, 4)))
@@ -0,0 +1,222 @@
+import threading
+from contextlib import contextmanager
+import graph
+
+
+class GraphSnapshot(graph.Graph):
+    '''
+    A version of a graph as published by a ConcurrentGraph.
+    Snapshots share the secondary adjacency maps of the vertices
+    that were not touched between versions (copy-on-write), so
+    publishing a new version costs O(n) for the primary maps plus
+    the size of the secondary maps that were modified.
+    Vertex and Edge objects are shared between versions, so vertex
+    handles and weight mappings of one version remain valid in the next.
+    Once published a snapshot is read-only.
+    '''
+
+    def __init__(self, base, version=0, copy_all=False):
+        '''
+        Do not call constructor directly. Use ConcurrentGraph.
+        [base]: graph.Graph (or GraphSnapshot) the new version derives from
+        [version]: number of the version
+        [copy_all]: copy every secondary map of base instead of sharing them.
+                    Used when base is not itself a snapshot and may still
+                    be modified by its owner.
+        '''
+        directed = base.is_directed()
+        if copy_all:
+            self._outgoing = {v: dict(m) for v, m in base._outgoing.items()}
+        else:
+            self._outgoing = dict(base._outgoing)
+        if not directed:
+            self._incoming = self._outgoing
+        elif copy_all:
+            self._incoming = {v: dict(m) for v, m in base._incoming.items()}
+        else:
+            self._incoming = dict(base._incoming)
+
+        # secondary maps that belong to this version only and
+        # can be modified in place while the version is a draft
+        self._owned_out = set(self._outgoing) if copy_all else set()
+        if not directed:
+            self._owned_in = self._owned_out
+        else:
+            self._owned_in = set(self._incoming) if copy_all else set()
+
+        self._version = version
+        self._frozen = False
+
+    def version(self):
+        '''
+        Return the version number of the snapshot
+        '''
+        return self._version
+
+    def is_frozen(self):
+        '''
+        Return True if the snapshot is published and thus read-only
+        '''
+        return self._frozen
+
+    def _freeze(self):
+        self._frozen = True
+        # ownership is only meaningful while drafting
+        self._owned_out = self._owned_in = None
+
+    def _check_writable(self):
+        if self._frozen:
+            # published versions are shared between readers
+            raise Exception('Graph snapshot is read-only')
+
+    def _own_outgoing(self, v):
+        if v not in self._owned_out:
+            self._outgoing[v] = dict(self._outgoing[v])
+            self._owned_out.add(v)
+
+    def _own_incoming(self, v):
+        if v not in self._owned_in:
+            self._incoming[v] = dict(self._incoming[v])
+            self._owned_in.add(v)
+
+    def insert_vertex(self, x=None):
+        self._check_writable()
+        v = super().insert_vertex(x)
+        # the new secondary maps were created by this version
+        self._owned_out.add(v)
+        self._owned_in.add(v)
+        return v
+
+    def insert_edge(self, u, v, x=None):
+        self._check_writable()
+        if u in self._outgoing and v in self._incoming:
+            self._own_outgoing(u)
+            self._own_incoming(v)
+        return super().insert_edge(u, v, x)
+
+    def delete_edge(self, u, v):
+        self._check_writable()
+        if self.get_edge(u, v):
+            self._own_outgoing(u)
+            self._own_incoming(v)
+        return super().delete_edge(u, v)
+
+    def delete_vertex(self, x):
+        self._check_writable()
+        if x in self._outgoing:
+            for vertex in self._outgoing[x]:
+                self._own_incoming(vertex)
+            if self.is_directed():
+                for vertex in self._incoming[x]:
+                    self._own_outgoing(vertex)
+        return super().delete_vertex(x)
+
+
+class ConcurrentGraph:
+    '''
+    Graph container for one or more writer threads and many reader threads.
+    Readers obtain an immutable GraphSnapshot with snapshot() and run any
+    algorithm on it without locking. Writers apply their updates on a
+    private copy-on-write draft that is published atomically, so readers
+    never block on writers and never observe half-applied updates.
+    Writers are serialized with a lock.
+    '''
+
+    def __init__(self, G=None, directed=False):
+        '''
+        [G]: optional graph.Graph with the initial contents.
+             It is copied, further changes to G are not reflected.
+        [directed]: used when G is not given to create an empty graph
+        '''
+        if G is None:
+            G = graph.Graph(directed=directed)
+        initial = GraphSnapshot(G, copy_all=True)
+        initial._freeze()
+        self._lock = threading.Lock()
+        self._writer = None  # thread holding the lock
+        self._snapshot = initial
+
+    def snapshot(self):
+        '''
+        Return the latest published version of the graph
+        '''
+        # a single attribute read is atomic, no locking needed
+        return self._snapshot
+
+    @contextmanager
+    def update(self):
+        '''
+        Context manager yielding a writable draft of the graph.
+        All updates done on the draft are published together on exit.
+        If the block raises, the draft is discarded and nothing is published.
+        Inside the block only the draft may be written: a write method of
+        the ConcurrentGraph would wait for the lock forever, so it raises.
+        '''
+        if self._writer == threading.get_ident():
+            raise Exception('ConcurrentGraph updated within its own update,'
+                            ' write to the draft instead')
+        with self._lock:
+            self._writer = threading.get_ident()
+            try:
+                current = self._snapshot
+                draft = GraphSnapshot(current, current.version() + 1)
+                yield draft
+                draft._freeze()
+                self._snapshot = draft
+            finally:
+                self._writer = None
+
+    def insert_vertex(self, x=None):
+        '''
+        Insert and return a new Vertex with element x
+        '''
+        with self.update() as draft:
+            return draft.insert_vertex(x)
+
+    def insert_edge(self, u, v, x=None):
+        '''
+        Insert and return a new Edge from u to v with auxiliary element x.
+        '''
+        with self.update() as draft:
+            return draft.insert_edge(u, v, x)
+
+    def delete_edge(self, u, v):
+        '''
+        Delete the edge from u to v
+        '''
+        with self.update() as draft:
+            return draft.delete_edge(u, v)
+
+    def delete_vertex(self, x):
+        '''
+        Delete vertex and all its adjacent edges from graph
+        '''
+        with self.update() as draft:
+            return draft.delete_vertex(x)
+
+
+if __name__ == '__main__':
+    from dijkstra import Dijkstra
+
+    E = [('a', 'b', 4), ('b', 'd', 10),
+         ('d', 'f', 11), ('b', 'c', 5),
+         ('a', 'c', 2), ('c', 'e', 3),
+         ('e', 'd', 4)]
+    G, weight_mapping = graph.create_graph(E, is_directed=True)
+    CG = ConcurrentGraph(G)
+
+    snapshot = CG.snapshot()
+    a = snapshot.get_vertex('a')
+    c = snapshot.get_vertex('c')
+    # a writer removes c while a reader still works on the old version
+    CG.delete_vertex(c)
+    d, _ = Dijkstra(snapshot, weight_mapping, a)
+    print('Version ' + str(snapshot.version()) + ' distances from a:')
+    for vertex in d:
+        print(vertex.element() + ': ' + str(d[vertex]))
+
+    latest = CG.snapshot()
+    d, _ = Dijkstra(latest, weight_mapping, a)
+    print('Version ' + str(latest.version()) + ' distances from a:')
+    for vertex in d:
+        print(vertex.element() + ': ' + str(d[vertex]))
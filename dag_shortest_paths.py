@@ -1,26 +1,150 @@
 import math
-from depth_first_search import depth_first_search
 
 
-def dag_shortest_paths(G, w, start_vertex):
+class CycleError(Exception):
+    '''
+    Raised when a topological ordering is requested for a graph
+    that has a cycle.
+    [cycle]: list of vertices [v0, v1, ..., vk] of the cycle, there is
+             an edge from each vertex to the next and from vk to v0
+    '''
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        elements = [str(vertex.element()) for vertex in cycle + cycle[:1]]
+        super().__init__('Graph has a cycle: ' + '->'.join(elements))
+
+
+def _find_cycle(G, remaining):
+    '''
+    Return a cycle among the [remaining] vertices that Kahn's
+    algorithm could not order. Each of them has a predecessor that is
+    remaining too, so walking backwards we eventually revisit a vertex.
+    '''
+    vertex = next(iter(remaining))
+    position = {}
+    walk = []
+    while vertex not in position:
+        position[vertex] = len(walk)
+        walk.append(vertex)
+        for predecessor in G.adjacent_vertices(vertex, outgoing=False):
+            if predecessor in remaining:
+                vertex = predecessor
+                break
+    cycle = walk[position[vertex]:]
+    # the walk followed the edges backwards
+    cycle.reverse()
+    return cycle
+
+
+def topological_order(G):
+    '''
+    Iterative (Kahn) topological sort over all vertices of the directed
+    graph G, in O(n+m). Raises CycleError if G has a cycle.
+    '''
+    # with no sources nothing is relaxed, only the ordering is computed
+    d, _ = dag_paths(G, {}, sources=())
+    return list(d)
 
-    traversal = depth_first_search(G)
-    ordering = traversal.get_topological_order(G, start_vertex)
 
-    distance_est = {vertex: math.inf for vertex in G.vertices()}
-    distance_est[start_vertex] = 0
-    spt_predecessor = {vertex: None for vertex in G.vertices()}
-    n = len(ordering)
+def dag_paths(G, w, sources=None, longest=False):
+    '''
+    Shortest (or longest) paths on a directed acyclic graph in a single
+    O(n+m) pass: vertices are ordered with Kahn's algorithm using their
+    in-degrees and the outgoing edges of each vertex are relaxed as soon
+    as it is ordered.
 
-    for i in range(n):
-        source = ordering[i]
-        for edge in G.incident_edges(source):
+    Inputs:
+    [G]: graph.Graph object of a directed acyclic graph
+    [w]: weight mapping of edges
+    [sources]: iterable of vertices of G the paths start from.
+               If None every vertex is a source i.e. the paths may start
+               anywhere. With longest=True this gives the critical paths.
+    [longest]: compute longest instead of shortest paths
+
+    Outputs:
+    [distance_est]: mapping of vertices, in topological order, to the length
+                    of the shortest (longest) path from a source. Vertices
+                    not reachable have math.inf (-math.inf if longest)
+    [spt_predecessor]: mapping of vertices to their predecessor
+                       on the path
+
+    Raises CycleError if G has a cycle.
+    '''
+    if not G.is_directed():
+        raise Exception('G is undirected')
+
+    unreached = -math.inf if longest else math.inf
+    in_degree = {}
+    distance_est = {}
+    spt_predecessor = {}
+    ordering = []
+    for vertex in G.vertices():
+        in_degree[vertex] = G.degree(vertex, outgoing=False)
+        distance_est[vertex] = 0 if sources is None else unreached
+        spt_predecessor[vertex] = None
+        if in_degree[vertex] == 0:
+            ordering.append(vertex)
+    if sources is not None:
+        for vertex in sources:
+            distance_est[vertex] = 0
+
+    # ordering grows while we scan it, so it also serves as the queue
+    for source in ordering:
+        reached = not math.isinf(distance_est[source])
+        for edge in G.incident_edges(source, outgoing=True):
             destination = edge.opposite(source)
-            if distance_est[destination] > distance_est[source] + w[edge]:
-                distance_est[destination] = distance_est[source] + w[edge]
-                spt_predecessor[destination] = source
+            if reached:
+                # relaxation step
+                candidate = distance_est[source] + w[edge]
+                if (candidate > distance_est[destination] if longest
+                        else candidate < distance_est[destination]):
+                    distance_est[destination] = candidate
+                    spt_predecessor[destination] = source
+            in_degree[destination] -= 1
+            if in_degree[destination] == 0:
+                ordering.append(destination)
+
+    if len(ordering) < len(in_degree):
+        remaining = {vertex for vertex in in_degree if in_degree[vertex] > 0}
+        raise CycleError(_find_cycle(G, remaining))
 
-    return distance_est, spt_predecessor
+    return ({vertex: distance_est[vertex] for vertex in ordering},
+            spt_predecessor)
+
+
+def dag_shortest_paths(G, w, start_vertex):
+    '''
+    Shortest paths from start_vertex on a directed acyclic graph.
+    See dag_paths for the outputs.
+    '''
+    return dag_paths(G, w, sources=[start_vertex])
+
+
+def dag_longest_paths(G, w, start_vertex):
+    '''
+    Longest paths from start_vertex on a directed acyclic graph.
+    See dag_paths for the outputs.
+    '''
+    return dag_paths(G, w, sources=[start_vertex], longest=True)
+
+
+def critical_path(G, w):
+    '''
+    Return (length, path) of a longest path of the directed acyclic graph G
+    where path is the list of its vertices.
+    Raises CycleError if G has a cycle.
+    '''
+    d, p = dag_paths(G, w, longest=True)
+    if not d:
+        return 0, []
+    vertex = max(d, key=d.get)
+    length = d[vertex]
+    path = []
+    while vertex is not None:
+        path.insert(0, vertex)
+        vertex = p[vertex]
+    return length, path
 
 
 if __name__ == '__main__':
@@ -48,3 +172,16 @@ if __name__ == '__main__':
             print('Shortest path to ' + key.element() + ' with value: ' + str(d[key]))
             x = '->'.join(elements)
             print(x)
+
+    length, path = critical_path(G, weight_mapping)
+    print('Critical path with value: ' + str(length))
+    print('->'.join(vertex.element() for vertex in path))
+
+    E = [('a', 'b', 1), ('b', 'c', 1), ('c', 'd', 1), ('d', 'b', 1)]
+    print('Graph with a cycle')
+    print(E)
+    G, weight_mapping = graph.create_graph(E, is_directed=True)
+    try:
+        dag_shortest_paths(G, weight_mapping, G.get_vertex('a'))
+    except CycleError as e:
+        print(e)
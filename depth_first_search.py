@@ -10,7 +10,11 @@ class depth_first_search:
         [time]: counter to record [arrival] and
                 [departure] times of the algorithm in each node.
         [state]: mapping from vertices to a state that can be 'unexplored',
-                 'exploring' and 'explored'.
+                 'exploring' and 'explored'. A depth limited traversal
+                 also leaves vertices 'parked' at the limit and vertices
+                 'waiting' for parked ones to depart.
+        [depth]: mapping of discovered vertices to their depth in
+                 the traversal tree
         [has_cycle]: boolean to indicate if the algorithm discovered that
                      the graph has a cycle
         [depth_traversal]: a list that we manipulate as a stack
@@ -21,6 +25,7 @@ class depth_first_search:
         '''
         self.time = 0
         self.state = {vertex: 'unexplored' for vertex in G.vertices()}
+        self.depth = {}
         self.depth_traversal = []
 
         self.arrival = {vertex: None for vertex in G.vertices()}
@@ -28,37 +33,159 @@ class depth_first_search:
 
         # edge_added is consulted in order to
         # avoid identifying false back edges
-        self.edge_added = {edge: False for edge in G.edges()}
+        self.edge_added = {}
 
         self.has_cycle = False
         if G.is_directed:
+            # vertices in order of departure, i.e. reversed
+            # topological order
             self._top_ordering = []
         else:
             self._top_ordering = None
 
+        # path of vertices being explored, each with
+        # the iterator over its remaining edges
+        self._stack = []
+        # vertices cut off by max_depth with their remaining edges
+        self._frontier = []
+        # a vertex departs only after the parked or waiting vertices
+        # it leads to: count of those per vertex and their dependents
+        self._waiting_on = {}
+        self._dependents = {}
+
+    def __call__(self, G, start):
+        '''
+        Perform the depth first traversal of G from the start vertex.
+        '''
+        self.dfs_compute(G, start)
+
     def dfs_compute(self, G, start):
         '''
         Put the unexplored neighbors of start vertex in a list
-        and recursively do the same for each one of them.
+        and do the same for each one of them, depth first.
         '''
-        self.state[start] = 'exploring'
-        self.time = self.time + 1
-        self.arrival[start] = self.time
-        for edge in G.incident_edges(start, outgoing=True):
-            neighbor = edge.opposite(start)
-            if self.state[neighbor] == 'unexplored':
+        for vertex, edge in self.traverse(G, start):
+            if edge is not None:
                 self.depth_traversal.append(edge)
-                self.edge_added[edge] = True
-                self.dfs_compute(G, neighbor)
-            else:
-                if self.edge_added[edge]:
-                    continue
-                if self.state[neighbor] == 'exploring':
-                    self.has_cycle = True
+
+    def _arrive(self, G, vertex, depth):
+        self.state[vertex] = 'exploring'
+        self.depth[vertex] = depth
         self.time = self.time + 1
-        self.departure[start] = self.time
-        self.state[start] = 'explored'
-        self._top_ordering.insert(0, start)
+        self.arrival[vertex] = self.time
+        self._stack.append((vertex, G.incident_edges(vertex, outgoing=True)))
+
+    def _depart(self, vertex):
+        departing = [vertex]
+        while departing:
+            vertex = departing.pop()
+            self.time = self.time + 1
+            self.departure[vertex] = self.time
+            self.state[vertex] = 'explored'
+            self._top_ordering.append(vertex)
+            for dependent in self._dependents.pop(vertex, ()):
+                self._waiting_on[dependent] -= 1
+                if self._waiting_on[dependent] == 0:
+                    del self._waiting_on[dependent]
+                    if self.state[dependent] == 'waiting':
+                        departing.append(dependent)
+
+    def _wait(self, vertex, successor):
+        self._waiting_on[vertex] = self._waiting_on.get(vertex, 0) + 1
+        self._dependents.setdefault(successor, []).append(vertex)
+
+    def _leave(self, vertex):
+        '''
+        Pop vertex from the stack. The vertex below it departs
+        only after vertex does.
+        '''
+        self._stack.pop()
+        if self.state[vertex] == 'exploring':
+            if vertex in self._waiting_on:
+                self.state[vertex] = 'waiting'
+            else:
+                self._depart(vertex)
+        if self._stack and self.state[vertex] != 'explored':
+            self._wait(self._stack[-1][0], vertex)
+
+    def _resume(self, max_depth):
+        '''
+        Put back on the stack the first parked vertex
+        within max_depth. Return False if there is none.
+        '''
+        for i, (vertex, edges) in enumerate(self._frontier):
+            if max_depth is None or self.depth[vertex] < max_depth:
+                del self._frontier[i]
+                self.state[vertex] = 'exploring'
+                self._stack.append((vertex, edges))
+                return True
+        return False
+
+    def traverse(self, G, start=None, max_depth=None,
+                 on_vertex=None, on_edge=None):
+        '''
+        Generator of the depth first traversal. Yields (vertex, edge)
+        as each vertex is discovered, where edge is the edge of the
+        traversal tree it was discovered through (None for start).
+        Arrival and departure times are recorded as the traversal goes.
+        The traversal state is kept in the instance: if the generator is
+        abandoned, a new call with start=None resumes the traversal where
+        it stopped without examining any edge twice. Passing another
+        unexplored start vertex continues into its component as well.
+
+        [max_depth]: depth limit in the traversal tree (not the hop
+                     distance from start, as a vertex first reached by
+                     a long path keeps that depth). Vertices at this
+                     depth are not expanded but parked, and the traversal
+                     goes on with their siblings. Parked vertices and the
+                     vertices leading to them do not depart, a later call
+                     with a larger (or no) limit resumes from them.
+                     For hop limits use breadth_first_search.
+        [on_vertex]: callback on each discovered vertex
+        [on_edge]: callback on each edge of the traversal tree
+        '''
+        if start is not None and self.state[start] == 'unexplored':
+            self._arrive(G, start, 0)
+            if on_vertex is not None:
+                on_vertex(start)
+            yield start, None
+
+        while self._stack or self._resume(max_depth):
+            vertex, edges = self._stack[-1]
+            if max_depth is not None and self.depth[vertex] >= max_depth:
+                # at the depth limit, park the vertex with its edges
+                self.state[vertex] = 'parked'
+                self._frontier.append((vertex, edges))
+                self._leave(vertex)
+                continue
+            descended = False
+            for edge in edges:
+                neighbor = edge.opposite(vertex)
+                if self.state[neighbor] == 'unexplored':
+                    self.edge_added[edge] = True
+                    self._arrive(G, neighbor, self.depth[vertex] + 1)
+                    if on_edge is not None:
+                        on_edge(edge)
+                    if on_vertex is not None:
+                        on_vertex(neighbor)
+                    yield neighbor, edge
+                    descended = True
+                    break
+                else:
+                    if self.edge_added.get(edge, False):
+                        continue
+                    if self.state[neighbor] == 'exploring':
+                        self.has_cycle = True
+                    elif self.state[neighbor] != 'explored':
+                        # parked or waiting, it must depart first
+                        self._wait(vertex, neighbor)
+            if not descended:
+                self._leave(vertex)
+
+        if not self._frontier and self._waiting_on:
+            # everything is expanded and these vertices still wait
+            # for each other: they are on a cycle
+            self.has_cycle = True
 
     def get_topological_order(self, G, start):
         if not G.is_directed:
@@ -68,4 +195,4 @@ class depth_first_search:
         if self.has_cycle:
             return None
         else:
-            return self._top_ordering
+            return self._top_ordering[::-1]
@@ -0,0 +1,619 @@
+'''
+Randomized differential tests: the optimized engines are run side by side
+with reference implementations on seeded random graphs (with negative
+weights, disconnected graphs, DAGs and graphs with cycles) and their
+results are asserted to match.
+
+Usage:
+python differential_tests.py [--seed S] [--trials T]
+python differential_tests.py --timing [--size N]
+The test_* functions can also be collected by pytest.
+'''
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+import graph
+import centrality
+from bellman_ford import Bellman_Ford
+from breadth_first_search import breadth_first_search
+from concurrent_graph import ConcurrentGraph
+from dag_shortest_paths import (dag_shortest_paths, dag_longest_paths,
+                                topological_order, CycleError)
+from depth_first_search import depth_first_search
+from dijkstra import Dijkstra
+from flow import Dinic, push_relabel
+from kruskal import Kruskal
+from query_client import QueryClient, QueryError
+from query_server import QueryServer
+
+TRIALS = 100
+
+
+# ------------------------- graph generators ----------------------------
+
+def random_edges(rng, n, p, directed=True, weights=(1, 10), dag=False):
+    '''
+    Return the weighted edges of a random graph on vertices 0..n-1 where
+    each possible edge exists with probability p. If dag is True edges
+    only go from lower to higher vertices (in a shuffled numbering).
+    '''
+    labels = list(range(n))
+    rng.shuffle(labels)
+    edges = []
+    for i in range(n):
+        for j in range(n):
+            if i == j or ((dag or not directed) and i > j):
+                continue
+            if rng.random() < p:
+                edges.append((labels[i], labels[j], rng.randint(*weights)))
+    return edges
+
+
+def random_graph(rng, n_max=12, directed=True, weights=(1, 10), dag=False):
+    '''
+    Return (G, w) of a random graph, with at least one edge. Low edge
+    probabilities give disconnected graphs and isolated vertices are
+    added now and then.
+    '''
+    while True:
+        n = rng.randint(2, n_max)
+        p = rng.choice([0.1, 0.2, 0.35, 0.6])
+        edges = random_edges(rng, n, p, directed, weights, dag)
+        if edges:
+            break
+    G, w = graph.create_graph(edges, is_directed=directed)
+    for k in range(rng.choice([0, 0, 1, 2])):
+        G.insert_vertex(n + k)
+    return G, w
+
+
+# ------------------------- reference implementations -------------------
+
+def reference_distances(G, w):
+    '''
+    All pairs distances with Floyd-Warshall.
+    d[(u, v)] is -math.inf if a negative cycle lies on a walk from u to v.
+    '''
+    V = list(G.vertices())
+    d = {(u, v): (0 if u is v else math.inf) for u in V for v in V}
+    for edge in G.edges():
+        u, v = edge.endPoints()
+        d[(u, v)] = min(d[(u, v)], w[edge])
+        if not G.is_directed():
+            d[(v, u)] = min(d[(v, u)], w[edge])
+    for k in V:
+        for u in V:
+            for v in V:
+                if d[(u, k)] + d[(k, v)] < d[(u, v)]:
+                    d[(u, v)] = d[(u, k)] + d[(k, v)]
+    for k in V:
+        if d[(k, k)] < 0:
+            for u in V:
+                for v in V:
+                    if d[(u, k)] < math.inf and d[(k, v)] < math.inf:
+                        d[(u, v)] = -math.inf
+    return d
+
+
+def reference_forest_weight(G, w):
+    '''
+    Weight of a minimum spanning forest with Prim's algorithm
+    '''
+    total = 0
+    seen = set()
+    for root in G.vertices():
+        if root in seen:
+            continue
+        heap = [(0, 0, root)]
+        counter = 1
+        while heap:
+            weight, _, vertex = heapq.heappop(heap)
+            if vertex in seen:
+                continue
+            seen.add(vertex)
+            total += weight
+            for edge in G.incident_edges(vertex):
+                neighbor = edge.opposite(vertex)
+                if neighbor not in seen:
+                    heapq.heappush(heap, (w[edge], counter, neighbor))
+                    counter += 1
+    return total
+
+
+def reference_reachable(G, start):
+    reached = {start}
+    stack = [start]
+    while stack:
+        vertex = stack.pop()
+        for neighbor in G.adjacent_vertices(vertex):
+            if neighbor not in reached:
+                reached.add(neighbor)
+                stack.append(neighbor)
+    return reached
+
+
+def reference_hops(G, start):
+    '''
+    Hop distances from start of the vertices reachable from it
+    '''
+    hops = {start: 0}
+    frontier = [start]
+    while frontier:
+        next_frontier = []
+        for vertex in frontier:
+            for neighbor in G.adjacent_vertices(vertex):
+                if neighbor not in hops:
+                    hops[neighbor] = hops[vertex] + 1
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return hops
+
+
+def has_cycle(G):
+    '''
+    Cycle detection with depth first search from every vertex
+    '''
+    depth = depth_first_search(G)
+    for vertex in G.vertices():
+        if depth.state[vertex] == 'unexplored':
+            depth(G, vertex)
+    return depth.has_cycle
+
+
+# ------------------------- differential tests --------------------------
+
+def test_dijkstra_matches_bellman_ford(seed=0, trials=TRIALS):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, w = random_graph(rng, weights=(0, 20))
+        start = rng.choice(list(G.vertices()))
+        d, p = Dijkstra(G, w, start)
+        reference, _ = Bellman_Ford(G, w, start)
+        assert d == reference
+        _check_predecessors(G, w, d, p)
+
+
+def test_bellman_ford_matches_floyd_warshall(seed=1, trials=TRIALS):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, w = random_graph(rng, n_max=9, weights=(-4, 10))
+        start = rng.choice(list(G.vertices()))
+        d, p = Bellman_Ford(G, w, start)
+        reference = reference_distances(G, w)
+        negative_cycle = any(reference[(start, v)] == -math.inf
+                             for v in G.vertices())
+        assert (d is None) == negative_cycle
+        if d is not None:
+            for v in G.vertices():
+                assert d[v] == reference[(start, v)]
+            _check_predecessors(G, w, d, p)
+
+
+def test_dag_paths_match_bellman_ford(seed=2, trials=TRIALS):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, w = random_graph(rng, dag=True, weights=(-10, 10))
+        start = rng.choice(list(G.vertices()))
+        d, p = dag_shortest_paths(G, w, start)
+        reference, _ = Bellman_Ford(G, w, start)
+        assert d == reference
+        _check_predecessors(G, w, d, p)
+
+        # longest paths are the shortest ones for the negated weights
+        d, _ = dag_longest_paths(G, w, start)
+        negated = {edge: -w[edge] for edge in w}
+        reference, _ = Bellman_Ford(G, negated, start)
+        assert d == {v: -reference[v] for v in reference}
+
+
+def test_cycle_detection(seed=3, trials=TRIALS):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, w = random_graph(rng, dag=rng.random() < 0.5)
+        try:
+            ordering = topological_order(G)
+        except CycleError as e:
+            assert has_cycle(G)
+            cycle = e.cycle
+            for i in range(len(cycle)):
+                assert G.get_edge(cycle[i], cycle[(i + 1) % len(cycle)])
+        else:
+            assert not has_cycle(G)
+            assert len(ordering) == G.vertex_count()
+            position = {v: i for i, v in enumerate(ordering)}
+            for edge in G.edges():
+                u, v = edge.endPoints()
+                assert position[u] < position[v]
+
+
+def test_kruskal_matches_prim(seed=4, trials=TRIALS):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, w = random_graph(rng, directed=False, weights=(1, 30))
+        T = Kruskal(G, w)
+        weight = 0
+        for edge in T.edges():
+            a, b = edge.endPoints()
+            weight += w[G.get_edge(G.get_vertex(a.element()),
+                                   G.get_vertex(b.element()))]
+        assert weight == reference_forest_weight(G, w)
+        assert not has_cycle(T)
+
+
+def test_traversals_reach_the_same_vertices(seed=5, trials=TRIALS):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, _ = random_graph(rng, directed=rng.random() < 0.5)
+        start = rng.choice(list(G.vertices()))
+        reference = reference_reachable(G, start)
+
+        breadth = breadth_first_search(G)
+        breadth(G, start)
+        depth = depth_first_search(G)
+        depth(G, start)
+        for traversal in (breadth.breadth_traversal, depth.depth_traversal):
+            # a tree on the reachable vertices
+            assert len(traversal) == len(reference) - 1
+            reached = {start}
+            for edge in traversal:
+                reached.update(edge.endPoints())
+            assert reached == reference
+
+
+def test_lazy_traversals_resume(seed=8, trials=TRIALS):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, _ = random_graph(rng, directed=rng.random() < 0.5)
+        start = rng.choice(list(G.vertices()))
+        for traversal in (breadth_first_search, depth_first_search):
+            eager = traversal(G)
+            eager(G, start)
+            expected = list(traversal(G).traverse(G, start))
+
+            # stop after a few vertices and resume with new generators
+            lazy = traversal(G)
+            found = []
+            generator = lazy.traverse(G, start)
+            while True:
+                chunk = list(itertools.islice(generator, rng.randint(1, 3)))
+                if not chunk:
+                    break
+                found += chunk
+                generator = lazy.traverse(G)
+            assert found == expected
+            assert lazy.has_cycle == eager.has_cycle
+            tree = (eager.breadth_traversal
+                    if traversal is breadth_first_search
+                    else eager.depth_traversal)
+            assert [edge for _, edge in found[1:]] == tree
+
+        # a hop limit keeps the vertices up to that breadth first depth
+        limit = rng.randint(0, 3)
+        breadth = breadth_first_search(G)
+        near = {vertex for vertex, _ in
+                breadth.traverse(G, start, max_depth=limit)}
+        hops = reference_hops(G, start)
+        assert near == {v for v in hops if hops[v] <= limit}
+        # and resuming without limit completes the traversal
+        near.update(vertex for vertex, _ in breadth.traverse(G))
+        assert near == reference_reachable(G, start)
+
+        # a depth limit parks the vertices at that tree depth and goes on
+        # with their siblings; raising the limit resumes from them
+        depth = depth_first_search(G)
+        found = []
+        for max_depth in (limit, limit + 1, None):
+            found += depth.traverse(G, start if not found else None,
+                                    max_depth=max_depth)
+            tree_depth = {start: 0}
+            for vertex, edge in found[1:]:
+                tree_depth[vertex] = tree_depth[edge.opposite(vertex)] + 1
+            assert tree_depth == depth.depth
+            if max_depth is None:
+                break
+            # every vertex whose tree depth is within the limit is found
+            for vertex in tree_depth:
+                assert tree_depth[vertex] <= max_depth
+                if tree_depth[vertex] < max_depth:
+                    neighbors = set(G.adjacent_vertices(vertex))
+                    assert neighbors <= tree_depth.keys()
+                else:
+                    assert depth.departure[vertex] is None
+        # and once resumed without limit the traversal is complete
+        assert len(found) == len(tree_depth)
+        assert tree_depth.keys() == reference_reachable(G, start)
+        eager = depth_first_search(G)
+        eager(G, start)
+        assert depth.has_cycle == eager.has_cycle
+        if not depth.has_cycle:
+            # every vertex departed after the vertices it leads to
+            position = {v: i for i, v in enumerate(depth._top_ordering)}
+            assert position.keys() == tree_depth.keys()
+            for u in tree_depth:
+                for v in G.adjacent_vertices(u):
+                    if G.is_directed():
+                        assert position[v] < position[u]
+
+
+def test_dinic_matches_push_relabel(seed=6, trials=TRIALS):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, c = random_graph(rng, directed=rng.random() < 0.7,
+                            weights=(0, 10))
+        source, sink = rng.sample(list(G.vertices()), 2)
+        value, flow, (S, T) = Dinic(G, c, source, sink)
+        reference, _, _ = push_relabel(G, c, source, sink)
+        assert value == reference
+        # the cut has the capacity of the flow
+        cut = 0
+        for edge in G.edges():
+            u, v = edge.endPoints()
+            if (u in S and v in T) or (not G.is_directed() and
+                                       v in S and u in T):
+                cut += c[edge]
+        assert cut == value
+
+
+def test_centrality_modes_agree(seed=7, trials=TRIALS // 5):
+    rng = random.Random(seed)
+    for _ in range(trials):
+        G, _ = random_graph(rng, directed=rng.random() < 0.5)
+        unit = {edge: 1 for edge in G.edges()}
+        bfs = centrality.betweenness_centrality(G)
+        dijkstra = centrality.betweenness_centrality(G, unit)
+        sampled = centrality.betweenness_centrality(
+            G, samples=G.vertex_count(), seed=seed)
+        for v in bfs:
+            assert math.isclose(bfs[v], dijkstra[v], abs_tol=1e-9)
+            assert math.isclose(bfs[v], sampled[v], abs_tol=1e-9)
+        rank = centrality.pagerank(G, tol=1e-12, max_iter=1000,
+                                   use_numpy=False)
+        assert math.isclose(sum(rank.values()), 1.0)
+        if centrality.numpy is not None:
+            vectorized = centrality.pagerank(G, tol=1e-12, max_iter=1000,
+                                             use_numpy=True)
+            for v in rank:
+                assert math.isclose(rank[v], vectorized[v], abs_tol=1e-9)
+
+
+def test_parallel_betweenness_matches_serial(seed=9, trials=TRIALS):
+    rng = random.Random(seed)
+    # a process pool per call is costly, keep to a few graphs
+    for _ in range(max(1, trials // 20)):
+        G, w = random_graph(rng, n_max=20, directed=rng.random() < 0.5)
+        for weights in (None, w):
+            serial = centrality.betweenness_centrality(G, weights)
+            parallel = centrality.betweenness_centrality(G, weights,
+                                                         processes=2)
+            for v in serial:
+                assert math.isclose(serial[v], parallel[v], abs_tol=1e-9)
+
+
+def test_snapshot_isolation(seed=10, trials=TRIALS):
+    rng = random.Random(seed)
+
+    def structure(H):
+        return ({(u, v) for u in H._outgoing for v in H._outgoing[u]},
+                {(u, v) for u in H._incoming for v in H._incoming[u]})
+
+    for _ in range(trials):
+        G, w = random_graph(rng, directed=rng.random() < 0.5)
+        CG = ConcurrentGraph(G)
+        snapshot = CG.snapshot()
+        before = structure(snapshot)
+        start = rng.choice(list(snapshot.vertices()))
+        distances, _ = Dijkstra(snapshot, w, start)
+
+        # the same writes on the ConcurrentGraph and on G,
+        # which shares the vertex objects but not the maps
+        for _ in range(rng.randint(1, 4)):
+            latest = CG.snapshot()
+            vertices = list(latest.vertices())
+            edges = list(latest.edges())
+            choice = rng.random()
+            if choice < 0.3 and len(vertices) > 2:
+                vertex = rng.choice(vertices)
+                CG.delete_vertex(vertex)
+                G.delete_vertex(vertex)
+            elif choice < 0.6 and edges:
+                u, v = rng.choice(edges).endPoints()
+                CG.delete_edge(u, v)
+                G.delete_edge(u, v)
+            else:
+                u, v = rng.sample(vertices, 2)
+                if not latest.get_edge(u, v):
+                    CG.insert_edge(u, v)
+                    G.insert_edge(u, v)
+
+        # an update that fails half way is not published
+        published = CG.snapshot()
+        try:
+            with CG.update() as draft:
+                draft.delete_vertex(next(iter(draft.vertices())))
+                raise KeyError('abort')
+        except KeyError:
+            pass
+        # and writing to CG within its own update raises, not deadlocks
+        try:
+            with CG.update():
+                CG.insert_vertex('nested')
+        except Exception:
+            pass
+        else:
+            assert False, 'nested update'
+        assert CG.snapshot() is published
+
+        assert structure(snapshot) == before
+        assert snapshot.version() == 0
+        assert Dijkstra(snapshot, w, start)[0] == distances
+        assert structure(CG.snapshot()) == structure(G)
+        try:
+            snapshot.insert_vertex('new')
+        except Exception:
+            pass
+        else:
+            assert False, 'snapshot is writable'
+
+
+def test_query_server_matches_dijkstra(seed=11, trials=TRIALS):
+    rng = random.Random(seed)
+    edges = random_edges(rng, 20, 0.2)
+    # a long path makes a slow Bellman_Ford query
+    edges += [(100 + i, 101 + i, 1) for i in range(300)]
+    G, w = graph.create_graph(edges, is_directed=True)
+    vertices = list(G.vertices())
+
+    async def expect_error(query, error):
+        try:
+            await query
+        except QueryError as e:
+            assert str(e) == error
+        else:
+            assert False, 'no ' + error
+
+    async def run():
+        server = QueryServer(edges, is_directed=True, use_processes=False)
+        await server.start()
+        client = QueryClient(port=server.port)
+        await client.connect()
+        try:
+            for _ in range(trials):
+                source, target = rng.sample(vertices, 2)
+                d, _ = Dijkstra(G, w, source)
+                result = await client.shortest_path(source.element(),
+                                                    target.element())
+                if math.isinf(d[target]):
+                    assert result == {'distance': None, 'path': None}
+                    continue
+                path = [G.get_vertex(x) for x in result['path']]
+                assert path[0] is source and path[-1] is target
+                assert result['distance'] == d[target] == sum(
+                    w[G.get_edge(u, v)] for u, v in zip(path, path[1:]))
+
+            await expect_error(client.query('nope', source=0),
+                               'Unknown op: nope')
+            await expect_error(client.shortest_path('x', 0),
+                               'Unknown vertex: x')
+            await expect_error(client.single_source(100, 'bellman_ford',
+                                                    deadline=0.001),
+                               'deadline exceeded')
+            await expect_error(client.query('bfs', source=0,
+                                            deadline=None),
+                               'Invalid deadline: None')
+        finally:
+            await server.close()
+
+        # queries fail once the server closed the connection, the
+        # second one after the client has seen the connection end
+        for _ in range(2):
+            try:
+                await asyncio.wait_for(client.ping(), 5)
+            except ConnectionError:
+                pass
+            else:
+                assert False, 'query on a closed connection'
+        await client.close()
+
+    asyncio.run(run())
+
+
+def _check_predecessors(G, w, d, p):
+    '''
+    The predecessor mapping must form shortest paths with the distances d
+    '''
+    for v, u in p.items():
+        if u is not None:
+            assert d[u] + w[G.get_edge(u, v)] == d[v]
+
+
+TESTS = [test_dijkstra_matches_bellman_ford,
+         test_bellman_ford_matches_floyd_warshall,
+         test_dag_paths_match_bellman_ford,
+         test_cycle_detection,
+         test_kruskal_matches_prim,
+         test_traversals_reach_the_same_vertices,
+         test_lazy_traversals_resume,
+         test_dinic_matches_push_relabel,
+         test_centrality_modes_agree,
+         test_parallel_betweenness_matches_serial,
+         test_snapshot_isolation,
+         test_query_server_matches_dijkstra]
+
+
+# ------------------------- timing comparison ---------------------------
+
+def _best_time(function, repeat=3):
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def compare_timings(size=300, seed=0):
+    '''
+    Time each optimized engine against its reference on one random graph
+    of [size] vertices, check that the results still match and print
+    the speedups.
+    '''
+    rng = random.Random(seed)
+    p = min(1.0, 8 / size)
+    dag_edges = random_edges(rng, size, p, dag=True, weights=(-10, 10))
+    G_dag, w_dag = graph.create_graph(dag_edges, is_directed=True)
+    edges = random_edges(rng, size, p, weights=(0, 20))
+    G, w = graph.create_graph(edges, is_directed=True)
+    start = next(iter(G.vertices()))
+    start_dag = next(iter(G_dag.vertices()))
+    source, sink = rng.sample(list(G.vertices()), 2)
+
+    cases = [('Dijkstra vs Bellman_Ford',
+              lambda: Dijkstra(G, w, start)[0],
+              lambda: Bellman_Ford(G, w, start)[0]),
+             ('dag_shortest_paths vs Bellman_Ford',
+              lambda: dag_shortest_paths(G_dag, w_dag, start_dag)[0],
+              lambda: Bellman_Ford(G_dag, w_dag, start_dag)[0]),
+             ('Dinic vs push_relabel',
+              lambda: Dinic(G, w, source, sink)[0],
+              lambda: push_relabel(G, w, source, sink)[0])]
+    if centrality.numpy is not None:
+        cases.append(('pagerank numpy vs python',
+                      lambda: centrality.pagerank(G, use_numpy=True),
+                      lambda: centrality.pagerank(G, use_numpy=False)))
+
+    print('Graph with ' + str(G.vertex_count()) + ' vertices and ' +
+          str(G.edges_count()) + ' edges')
+    for name, optimized, reference in cases:
+        fast, result = _best_time(optimized)
+        slow, expected = _best_time(reference)
+        if isinstance(result, dict):
+            same = all(math.isclose(result[v], expected[v], abs_tol=1e-9)
+                       for v in expected)
+        else:
+            same = result == expected
+        print('%-36s %9.2f ms %9.2f ms  speedup %6.1fx  %s' %
+              (name, 1000 * fast, 1000 * slow, slow / fast,
+               'match' if same else 'MISMATCH'))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trials', type=int, default=TRIALS)
+    parser.add_argument('--timing', action='store_true',
+                        help='compare running times instead')
+    parser.add_argument('--size', type=int, default=300,
+                        help='vertices of the timing graph')
+    args = parser.parse_args()
+
+    if args.timing:
+        compare_timings(args.size, args.seed)
+    else:
+        for test in TESTS:
+            test(seed=args.seed, trials=args.trials)
+            print('ok  ' + test.__name__)
@@ -0,0 +1,278 @@
+from collections import deque
+
+
+class _Residual:
+    '''
+    Compact residual graph of a graph.Graph with a capacity mapping.
+    Vertices are numbered by position and arcs are kept in flat lists:
+    arc k goes to head[k] with residual capacity capacity[k] and
+    arc k ^ 1 is its reverse. Arcs 2i and 2i + 1 come from edges[i].
+    An undirected edge gives capacity in both directions.
+    '''
+
+    def __init__(self, G, c):
+        self.vertices = list(G.vertices())
+        self.position = {vertex: i for i, vertex in enumerate(self.vertices)}
+        n = len(self.vertices)
+        self.head = []
+        self.capacity = []
+        self.adjacency = [[] for _ in range(n)]  # arcs leaving each vertex
+        self.edges = []
+        directed = G.is_directed()
+        for edge in G.edges():
+            u, v = edge.endPoints()
+            if u is v:
+                # loops never carry flow
+                continue
+            i = self.position[u]
+            j = self.position[v]
+            k = len(self.head)
+            self.head += [j, i]
+            self.capacity += [c[edge], 0 if directed else c[edge]]
+            self.adjacency[i].append(k)
+            self.adjacency[j].append(k + 1)
+            self.edges.append(edge)
+        self._initial = list(self.capacity[0::2])
+
+    def reachable(self, s):
+        '''
+        Return the positions of the vertices reachable from s
+        through arcs with residual capacity
+        '''
+        seen = [False] * len(self.vertices)
+        seen[s] = True
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            for k in self.adjacency[v]:
+                x = self.head[k]
+                if self.capacity[k] > 0 and not seen[x]:
+                    seen[x] = True
+                    queue.append(x)
+        return seen
+
+    def result(self, s, value):
+        '''
+        Return (value, flow, (S, T)) where [flow] maps each edge to the
+        flow it carries from its origin to its destination (negative if
+        an undirected edge carries flow the other way) and S, T are the
+        sets of vertices of the source and sink side of a minimum cut.
+        '''
+        flow = {}
+        for i, edge in enumerate(self.edges):
+            flow[edge] = self._initial[i] - self.capacity[2 * i]
+        seen = self.reachable(s)
+        S = {vertex for i, vertex in enumerate(self.vertices) if seen[i]}
+        T = {vertex for i, vertex in enumerate(self.vertices) if not seen[i]}
+        return value, flow, (S, T)
+
+
+def _positions(R, source, sink):
+    if source is sink:
+        raise Exception('Source and sink must be different vertices')
+    return R.position[source], R.position[sink]
+
+
+def Dinic(G, c, source, sink):
+    '''
+    Maximum flow from source to sink with Dinic's algorithm: repeatedly
+    build the level graph with a breadth first search and saturate it
+    with a blocking flow. O(n^2 m).
+
+    Inputs:
+    [G]: graph.Graph object, directed or undirected
+    [c]: capacity mapping of edges with non-negative capacities,
+         in the same shape as the weight mapping of graph.create_graph
+    [source], [sink]: graph.Vertex instances of G
+
+    Outputs:
+    [value]: value of the maximum flow
+    [flow]: mapping of edges to the flow they carry
+    [(S, T)]: vertex partition of a minimum cut with source in S
+    '''
+    R = _Residual(G, c)
+    s, t = _positions(R, source, sink)
+    head = R.head
+    capacity = R.capacity
+    adjacency = R.adjacency
+    n = len(R.vertices)
+    value = 0
+
+    while True:
+        # level graph with a deque based breadth first search
+        level = [-1] * n
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            for k in adjacency[v]:
+                x = head[k]
+                if capacity[k] > 0 and level[x] < 0:
+                    level[x] = level[v] + 1
+                    queue.append(x)
+        if level[t] < 0:
+            break
+
+        # blocking flow with current-arc pointers and an explicit path
+        current = [0] * n
+        path = []
+        v = s
+        while True:
+            if v == t:
+                f = min(capacity[k] for k in path)
+                for k in path:
+                    capacity[k] -= f
+                    capacity[k ^ 1] += f
+                value += f
+                path = []
+                v = s
+                continue
+            arcs = adjacency[v]
+            while current[v] < len(arcs):
+                k = arcs[current[v]]
+                if capacity[k] > 0 and level[head[k]] == level[v] + 1:
+                    break
+                current[v] += 1
+            if current[v] < len(arcs):
+                k = arcs[current[v]]
+                path.append(k)
+                v = head[k]
+            elif v == s:
+                break
+            else:
+                # dead end, remove v from the level graph and retreat
+                level[v] = -1
+                k = path.pop()
+                v = head[k ^ 1]
+                current[v] += 1
+
+    return R.result(s, value)
+
+
+def push_relabel(G, c, source, sink):
+    '''
+    Maximum flow from source to sink with the highest-label variant of
+    the push-relabel algorithm with the gap heuristic. O(n^2 sqrt(m)).
+    Inputs and outputs as in Dinic.
+    '''
+    R = _Residual(G, c)
+    s, t = _positions(R, source, sink)
+    head = R.head
+    capacity = R.capacity
+    adjacency = R.adjacency
+    n = len(R.vertices)
+
+    # initial heights are the distances to the sink
+    height = [n] * n
+    height[t] = 0
+    queue = deque([t])
+    while queue:
+        v = queue.popleft()
+        for k in adjacency[v]:
+            x = head[k]
+            if capacity[k ^ 1] > 0 and height[x] == n and x != s:
+                height[x] = height[v] + 1
+                queue.append(x)
+    height[s] = n
+
+    excess = [0] * n
+    # active vertices bucketed by height, stale entries are skipped
+    buckets = [[] for _ in range(2 * n + 1)]
+    highest = 0
+    # count of vertices with each height, for the gap heuristic
+    count = [0] * (2 * n + 1)
+    for v in range(n):
+        count[height[v]] += 1
+    for k in adjacency[s]:
+        f = capacity[k]
+        if f > 0:
+            x = head[k]
+            capacity[k] = 0
+            capacity[k ^ 1] += f
+            if excess[x] == 0 and x != t:
+                buckets[height[x]].append(x)
+                highest = max(highest, height[x])
+            excess[x] += f
+
+    current = [0] * n
+    while highest >= 0:
+        if not buckets[highest]:
+            highest -= 1
+            continue
+        v = buckets[highest].pop()
+        if height[v] != highest or excess[v] == 0:
+            continue
+        # discharge v
+        arcs = adjacency[v]
+        while excess[v] > 0:
+            if current[v] == len(arcs):
+                # relabel
+                old = height[v]
+                count[old] -= 1
+                height[v] = 1 + min(height[head[k]] for k in arcs
+                                    if capacity[k] > 0)
+                count[height[v]] += 1
+                current[v] = 0
+                if count[old] == 0 and old < n:
+                    # gap: vertices above it can no longer reach the sink,
+                    # lift them at once above the source
+                    for u in range(n):
+                        if old < height[u] < n:
+                            count[height[u]] -= 1
+                            height[u] = n + 1
+                            count[n + 1] += 1
+                            current[u] = 0
+                            if excess[u] > 0 and u != v:
+                                buckets[n + 1].append(u)
+                                highest = max(highest, n + 1)
+                continue
+            k = arcs[current[v]]
+            x = head[k]
+            if capacity[k] > 0 and height[v] == height[x] + 1:
+                f = min(excess[v], capacity[k])
+                capacity[k] -= f
+                capacity[k ^ 1] += f
+                excess[v] -= f
+                if excess[x] == 0 and x != s and x != t:
+                    buckets[height[x]].append(x)
+                    highest = max(highest, height[x])
+                excess[x] += f
+            else:
+                current[v] += 1
+
+    return R.result(s, excess[t])
+
+
+def max_flow(G, c, source, sink, method='dinic'):
+    '''
+    Maximum flow and minimum cut from source to sink.
+    [method]: 'dinic' or 'push_relabel'
+    Inputs and outputs as in Dinic.
+    '''
+    if method == 'dinic':
+        return Dinic(G, c, source, sink)
+    if method == 'push_relabel':
+        return push_relabel(G, c, source, sink)
+    raise Exception('Unknown max flow method: ' + str(method))
+
+
+if __name__ == '__main__':
+    import graph
+
+    E = [('s', 'a', 10), ('s', 'c', 10), ('a', 'b', 4), ('a', 'c', 2),
+         ('a', 'd', 8), ('c', 'd', 9), ('d', 'b', 6), ('b', 't', 10),
+         ('d', 't', 10)]
+    print('Maximum flow from s to t for graph')
+    print(E)
+    G, capacity = graph.create_graph(E, is_directed=True)
+    source = G.get_vertex('s')
+    sink = G.get_vertex('t')
+    for method in ('dinic', 'push_relabel'):
+        value, flow, (S, T) = max_flow(G, capacity, source, sink, method)
+        print(method + ': flow value ' + str(value))
+        for edge in flow:
+            u, v = edge.endPoints()
+            print(u.element() + '->' + v.element() + ': ' + str(flow[edge]))
+        print('Minimum cut: ' +
+              str(sorted(vertex.element() for vertex in S)) + ' | ' +
+              str(sorted(vertex.element() for vertex in T)))
@@ -1,3 +1,6 @@
+import sys
+
+
 class Graph:
     '''
     Representation of a simple graph using an adjacency map.
@@ -8,6 +11,8 @@ class Graph:
 
 # ------------------------- nested Vertex class -------------------------
 
+    # Vertex and Edge objects are hashable by identity through the default
+    # object hash, so they can be map/set keys
     class Vertex:
         '''
         Class for representing vertex structure for a graph.
@@ -26,27 +31,22 @@ class Graph:
             '''
             return self._element
 
-        def __hash__(self):
-            '''
-            will allow vertex to be a map/set key
-            '''
-            return hash(id(self))
-
-# ------------------------- nested Edge class ---------------------------
+# ------------------------- nested Edge classes -------------------------
 
     class Edge:
         '''
         Class for representing edge structure for a graph.
+        Edges without element hold just their two endpoints,
+        see LabeledEdge for the ones with an element.
         '''
-        __slots__ = '_origin', '_destination', '_element'
+        __slots__ = '_origin', '_destination'
 
-        def __init__(self, u, v, x):
+        def __init__(self, u, v):
             '''
-            Do not call constructor directly. Use Graph's insert_edge(x).
+            Do not call constructor directly. Use Graph's insert_edge().
             '''
             self._origin = u
             self._destination = v
-            self._element = x
 
         def endPoints(self):
             '''
@@ -64,13 +64,27 @@ class Graph:
             '''
             Return element associated with this edge.
             '''
-            return self._element
+            return None
+
+    class LabeledEdge(Edge):
+        '''
+        Class for representing edge structure with an element for a graph.
+        '''
+        __slots__ = '_element'
+
+        def __init__(self, u, v, x):
+            '''
+            Do not call constructor directly. Use Graph's insert_edge(x).
+            '''
+            self._origin = u
+            self._destination = v
+            self._element = x
 
-        def __hash__(self):
+        def element(self):
             '''
-            will allow edge to be a map/set key
+            Return element associated with this edge.
             '''
-            return hash(id(self))
+            return self._element
 
 # ------------------------- Graph Methods -------------------------------
     def __init__(self, directed=False):
@@ -184,10 +198,16 @@ class Graph:
                 raise Exception('Vertice already exists')
                 return None
 
+        return self._add_vertex(x)
+
+    def _add_vertex(self, x):
+        '''
+        Insert a new Vertex with element x without checking for duplicates
+        '''
         v = self.Vertex(x)
 
         self._outgoing[v] = {}
-        if self.is_directed:
+        if self.is_directed():
             self._incoming[v] = {}
 
         return v
@@ -195,6 +215,8 @@ class Graph:
     def insert_edge(self, u, v, x=None):
         '''
         Insert and return a new Edge from u to v with auxiliary element x.
+        Edges without element are stored as lighter Edge objects,
+        the ones with an element as LabeledEdge (a subclass of Edge).
         '''
         if (v not in self._outgoing) or (v not in self._outgoing):
             # raise exception if one of vertices does not exist
@@ -208,7 +230,10 @@ class Graph:
             raise Exception('Edge already exists.')
             return None
 
-        e = self.Edge(u, v, x)
+        if x is None:
+            e = self.Edge(u, v)
+        else:
+            e = self.LabeledEdge(u, v, x)
 
         self._outgoing[u][v] = e
         self._incoming[v][u] = e
@@ -244,15 +269,77 @@ class Graph:
                 del self._incoming[vertex][x]
             else:
                 del self._outgoing[vertex][x]
+        if self.is_directed():
+            # delete reference to the edges entering x
+            for vertex in self._incoming[x]:
+                del self._outgoing[vertex][x]
+            del self._incoming[x]
         # delete reference to the vertex itself
         del self._outgoing[x]
         return None
 
-
-def create_graph(sequence, is_directed=False):
+    def memory_usage(self):
+        '''
+        Return a mapping with an estimate in bytes of the memory held by
+        the graph, as reported by sys.getsizeof:
+        [vertices]: Vertex objects and their elements
+        [edges]: Edge objects and their elements
+        [adjacency]: primary and secondary adjacency maps
+        [total]: sum of the above
+        [bytes_per_vertex]: vertices and primary maps per vertex
+        [bytes_per_edge]: edges and secondary maps per edge
+        The adjacency maps are scanned once without building any
+        auxiliary collection, so it is safe to call on huge graphs.
+        Elements shared between several vertices/edges are counted
+        for each of them.
+        '''
+        directed = self.is_directed()
+        vertices = 0
+        edges = 0
+        m = 0
+        secondary = 0
+        for vertex, secondary_map in self._outgoing.items():
+            vertices += sys.getsizeof(vertex)
+            if vertex.element() is not None:
+                vertices += sys.getsizeof(vertex.element())
+            secondary += sys.getsizeof(secondary_map)
+            if directed:
+                secondary += sys.getsizeof(self._incoming[vertex])
+            for edge in secondary_map.values():
+                # an undirected edge is in the maps of both endpoints,
+                # count it at its origin
+                if directed or edge._origin is vertex:
+                    m += 1
+                    edges += sys.getsizeof(edge)
+                    if edge.element() is not None:
+                        edges += sys.getsizeof(edge.element())
+
+        primary = sys.getsizeof(self._outgoing)
+        if directed:
+            primary += sys.getsizeof(self._incoming)
+
+        n = self.vertex_count()
+        return {'vertices': vertices,
+                'edges': edges,
+                'adjacency': primary + secondary,
+                'total': vertices + edges + primary + secondary,
+                'bytes_per_vertex': (vertices + primary) / n if n else 0,
+                'bytes_per_edge': (edges + secondary) / m if m else 0}
+
+
+def create_graph(sequence, is_directed=False, label_edges=True):
+    '''
+    Create a graph from a list of tuples (u, v) or (u, v, weight)
+    of its edges where u and v are the (hashable) vertex elements.
+    Returns the graph and the mapping of its edges to their weights
+    (1 if no weights are given).
+    If label_edges is True every edge gets the element str(u) + str(v),
+    else edges have no element and take less memory.
+    '''
 
     G = Graph(directed=is_directed)
     weight_mapping = {}
+    vertex_of = {}  # mapping of elements to vertices
 
     if len(sequence[0]) == 3:
         weighted = True
@@ -261,19 +348,20 @@ def create_graph(sequence, is_directed=False):
 
     for edge in sequence:
         source, destination = edge[0:2]
-        try:
-            source_vertex = G.insert_vertex(source)
-        except Exception:
-            source_vertex = G.get_vertex(source)
-
-        try:
-            destination_vertex = G.insert_vertex(destination)
-        except Exception:
-            destination_vertex = G.get_vertex(destination)
-
-        new_edge = G.insert_edge(source_vertex,
-                                 destination_vertex,
-                                 str(source) + str(destination))
+        source_vertex = vertex_of.get(source)
+        if source_vertex is None:
+            source_vertex = vertex_of[source] = G._add_vertex(source)
+
+        destination_vertex = vertex_of.get(destination)
+        if destination_vertex is None:
+            destination_vertex = vertex_of[destination] = \
+                G._add_vertex(destination)
+
+        if label_edges:
+            label = str(source) + str(destination)
+        else:
+            label = None
+        new_edge = G.insert_edge(source_vertex, destination_vertex, label)
         if weighted:
             weight_mapping[new_edge] = edge[2]
         else:
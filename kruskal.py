@@ -23,6 +23,9 @@ def Kruskal(G, w):
     # instantiate the tree
     T = graph.Graph()
 
+    if not sorted_edges:
+        return T
+
     # minimum edge will always belong to MST
     edge = sorted_edges.pop(0)
     endpoints = edge.endPoints()
@@ -40,11 +43,11 @@ def Kruskal(G, w):
     tree_edges = []
     tree_edges.append(T.insert_edge(source_vertex,
                                     destination_vertex,
-                                    source + destination))
-    # var to hold the start of dfs (to discover cycle)
-    tree_root = source_vertex
+                                    str(source) + str(destination)))
 
-    while (T.vertex_count() < n):
+    # a spanning tree has n - 1 edges, a forest stops
+    # when the edges run out
+    while len(tree_edges) < n - 1 and sorted_edges:
         new_edge = sorted_edges.pop(0)
         endpoints = new_edge.endPoints()
         source = endpoints[0].element()
@@ -56,21 +59,22 @@ def Kruskal(G, w):
             source_vertex = T.get_vertex(source)
         else:
             source_vertex = T.insert_vertex(source)
-            tree_vertices.update(source)
+            tree_vertices.add(source)
 
         if destination in tree_vertices:
             destination_vertex = T.get_vertex(destination)
         else:
             destination_vertex = T.insert_vertex(destination)
-            tree_vertices.update(destination)
+            tree_vertices.add(destination)
 
         # insert new edge
         tree_edges.append(T.insert_edge(source_vertex,
                                         destination_vertex,
-                                        source + destination))
-        # if this edge introduces a cycle in the MST
+                                        str(source) + str(destination)))
+        # if this edge introduces a cycle in the MST. The cycle
+        # can only be in the component of the new edge
         depth = depth_first_search(T)
-        depth(T, tree_root)
+        depth(T, source_vertex)
         if depth.has_cycle:
             # get rid of it
             bad_edge = tree_edges.pop(-1)
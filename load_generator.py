@@ -0,0 +1,124 @@
+'''
+Load generator for query_server.QueryServer.
+Sends random queries over a number of concurrent connections and reports
+throughput and latency percentiles.
+Without --port it starts its own server on a random graph.
+'''
+import argparse
+import asyncio
+import random
+import time
+from query_client import QueryClient, QueryError
+from query_server import QueryServer
+
+
+def random_edges(n, m, seed=None):
+    '''
+    Return m random weighted edges of a directed graph on vertices 0..n-1
+    '''
+    rng = random.Random(seed)
+    edges = {}
+    while len(edges) < m:
+        u = rng.randrange(n)
+        v = rng.randrange(n)
+        if u != v and (u, v) not in edges:
+            edges[(u, v)] = rng.randint(1, 100)
+    return [[u, v, weight] for (u, v), weight in edges.items()]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float('nan')
+    k = min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))
+    return sorted_values[k]
+
+
+async def run_load(host, port, op, vertices, connections, requests,
+                   algorithm, deadline, seed=None):
+    '''
+    Send [requests] queries spread over [connections] connections.
+    Returns (elapsed seconds, list of latencies, count of errors)
+    '''
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def one_query(client):
+        source = rng.choice(vertices)
+        if op == 'shortest_path':
+            await client.shortest_path(source, rng.choice(vertices),
+                                       algorithm, deadline)
+        elif op == 'single_source':
+            await client.single_source(source, algorithm, deadline)
+        elif op == 'bfs':
+            await client.bfs(source, deadline)
+        else:
+            await client.ping()
+
+    async def connection():
+        nonlocal errors
+        async with QueryClient(host, port) as client:
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    await one_query(client)
+                except QueryError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    return time.perf_counter() - start, latencies, errors
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None,
+                        help='port of a running server')
+    parser.add_argument('--op', default='shortest_path',
+                        choices=['shortest_path', 'single_source',
+                                 'bfs', 'ping'])
+    parser.add_argument('--algorithm', default='dijkstra',
+                        choices=['dijkstra', 'bellman_ford'])
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--deadline', type=float, default=None)
+    parser.add_argument('--vertices', type=int, default=1000,
+                        help='vertices of the random graph; with --port the '
+                             'server graph must have vertices 0..n-1')
+    parser.add_argument('--edges', type=int, default=5000,
+                        help='edges of the random graph (self hosted)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    async def main():
+        server = None
+        port = args.port
+        if port is None:
+            edges = random_edges(args.vertices, args.edges, args.seed)
+            server = QueryServer(edges, is_directed=True,
+                                 host=args.host, workers=args.workers)
+            await server.start()
+            port = server.port
+        try:
+            elapsed, latencies, errors = await run_load(
+                args.host, port, args.op, list(range(args.vertices)),
+                args.connections, args.requests, args.algorithm,
+                args.deadline, args.seed)
+        finally:
+            if server is not None:
+                await server.close()
+
+        latencies.sort()
+        print('Queries: ' + str(len(latencies)) +
+              ' errors: ' + str(errors))
+        print('Throughput: %.1f queries/s' % (len(latencies) / elapsed))
+        for p in (50, 90, 99, 99.9):
+            print('p%s latency: %.2f ms' %
+                  (p, 1000 * percentile(latencies, p)))
+        print('max latency: %.2f ms' % (1000 * latencies[-1]))
+
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+import asyncio
+import itertools
+import json
+
+
+class QueryError(Exception):
+    '''
+    Error response of the query server
+    '''
+
+
+class QueryClient:
+    '''
+    Asyncio client of query_server.QueryServer.
+    Many queries can be awaited concurrently over the same connection,
+    responses are matched to their queries by id.
+
+    Example usage:
+        async with QueryClient(port=8765) as client:
+            result = await client.shortest_path('a', 'f')
+    '''
+
+    def __init__(self, host='127.0.0.1', port=8765):
+        self._host = host
+        self._port = port
+        self._reader = None
+        self._writer = None
+        self._receiver = None
+        self._counter = itertools.count()
+        self._waiting = {}  # mapping of query ids to futures
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(
+            self._host, self._port)
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._receiver
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if response.get('ok'):
+                    future.set_result(response.get('result'))
+                else:
+                    future.set_exception(QueryError(response.get('error')))
+        except ConnectionError:
+            pass
+        finally:
+            # fail the queries that will never be answered
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(
+                        ConnectionError('Connection to server closed'))
+            self._waiting.clear()
+
+    async def query(self, op, **params):
+        '''
+        Send a query and return its result.
+        Raises QueryError if the server answers with an error and
+        ConnectionError if the connection is closed.
+        '''
+        if self._receiver.done() or self._writer.is_closing():
+            raise ConnectionError('Connection to server closed')
+        request_id = next(self._counter)
+        request = dict(params, id=request_id, op=op)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        try:
+            self._writer.write(json.dumps(request).encode() + b'\n')
+            # wait here if the server does not keep up with our requests
+            await self._writer.drain()
+            return await future
+        finally:
+            # also when the caller is cancelled or times out
+            self._waiting.pop(request_id, None)
+
+    async def ping(self):
+        return await self.query('ping')
+
+    async def shortest_path(self, source, target, algorithm='dijkstra',
+                            deadline=None):
+        '''
+        Return {'distance': d, 'path': [elements]} for the shortest path
+        from source to target. Both are None if target is unreachable.
+        '''
+        params = {'source': source, 'target': target, 'algorithm': algorithm}
+        if deadline is not None:
+            params['deadline'] = deadline
+        return await self.query('shortest_path', **params)
+
+    async def single_source(self, source, algorithm='dijkstra',
+                            deadline=None):
+        '''
+        Return a mapping of each vertex element to its distance from source.
+        Unreachable vertices have distance None.
+        '''
+        params = {'source': source, 'algorithm': algorithm}
+        if deadline is not None:
+            params['deadline'] = deadline
+        result = await self.query('single_source', **params)
+        return {element: distance
+                for element, distance in result['distances']}
+
+    async def bfs(self, source, deadline=None):
+        '''
+        Return the edges of the breadth first traversal from source
+        as a list of (u, v) element tuples.
+        '''
+        params = {'source': source}
+        if deadline is not None:
+            params['deadline'] = deadline
+        result = await self.query('bfs', **params)
+        return [tuple(edge) for edge in result['edges']]
@@ -0,0 +1,291 @@
+import asyncio
+import concurrent.futures
+import functools
+import json
+import math
+import graph
+from dijkstra import Dijkstra
+from bellman_ford import Bellman_Ford
+from breadth_first_search import breadth_first_search
+
+
+# graph of the worker (process or thread) executing the queries.
+# Set by _load_graph, once per worker process.
+_worker_graph = None
+_worker_weights = None
+_worker_index = None
+
+SHORTEST_PATH_ALGORITHMS = {'dijkstra': Dijkstra,
+                            'bellman_ford': Bellman_Ford}
+
+QUERY_OPS = ('shortest_path', 'single_source', 'bfs')
+
+
+def _load_graph(edges, is_directed):
+    '''
+    Build the graph served by the queries of this worker
+    '''
+    global _worker_graph, _worker_weights, _worker_index
+    _worker_graph, _worker_weights = graph.create_graph(
+        edges, is_directed=is_directed)
+    _worker_index = {vertex.element(): vertex
+                     for vertex in _worker_graph.vertices()}
+
+
+def _lookup(element):
+    vertex = _worker_index.get(element)
+    if vertex is None:
+        raise Exception('Unknown vertex: ' + str(element))
+    return vertex
+
+
+def _run_query(request):
+    '''
+    Execute a query on the graph of the worker.
+    Returns a json serializable result; unreachable distances are None.
+    '''
+    op = request.get('op')
+    if op not in QUERY_OPS:
+        raise Exception('Unknown op: ' + str(op))
+    source = _lookup(request.get('source'))
+
+    if op == 'bfs':
+        breadth = breadth_first_search(_worker_graph)
+        breadth(_worker_graph, source)
+        return {'edges': [[u.element(), v.element()] for u, v in
+                          (edge.endPoints()
+                           for edge in breadth.breadth_traversal)]}
+
+    algorithm = request.get('algorithm', 'dijkstra')
+    if algorithm not in SHORTEST_PATH_ALGORITHMS:
+        raise Exception('Unknown algorithm: ' + str(algorithm))
+    d, p = SHORTEST_PATH_ALGORITHMS[algorithm](_worker_graph,
+                                               _worker_weights,
+                                               source)
+    if d is None:
+        raise Exception('Negative cycle detected')
+
+    if op == 'single_source':
+        return {'distances': [[vertex.element(),
+                               None if math.isinf(d[vertex]) else d[vertex]]
+                              for vertex in d]}
+    if op == 'shortest_path':
+        target = _lookup(request.get('target'))
+        if math.isinf(d[target]):
+            return {'distance': None, 'path': None}
+        path = []
+        vertex = target
+        while vertex is not None:
+            path.insert(0, vertex.element())
+            vertex = p[vertex]
+        return {'distance': d[target], 'path': path}
+
+
+class QueryServer:
+    '''
+    Asyncio TCP server answering shortest-path and traversal queries on
+    a graph that is loaded once. The protocol is JSON lines: each request
+    is a json object on its own line and each response carries the id
+    of the request it answers. Responses may arrive out of order.
+
+    Requests:
+    {"id": 1, "op": "shortest_path", "source": s, "target": t,
+     "algorithm": "dijkstra" | "bellman_ford", "deadline": seconds}
+    {"id": 2, "op": "single_source", "source": s, "algorithm": ...}
+    {"id": 3, "op": "bfs", "source": s}
+    {"id": 4, "op": "ping"}
+
+    Responses:
+    {"id": 1, "ok": true, "result": {...}}
+    {"id": 1, "ok": false, "error": "deadline exceeded"}
+
+    Queries run in a worker pool so that the event loop stays responsive.
+    At most [max_pending] queries are in flight over all connections;
+    when this limit is reached the server stops reading requests, which
+    pushes back on the clients through TCP flow control.
+    A query not answered within its deadline gets an error response.
+    The deadline of a request can only be shorter than the server's one.
+    A query past its deadline can not be interrupted in the worker, it
+    keeps its slot among the [max_pending] ones until it ends.
+    '''
+
+    def __init__(self, edges, is_directed=False, host='127.0.0.1', port=0,
+                 workers=None, use_processes=True, max_pending=64,
+                 deadline=10.0):
+        '''
+        [edges]: list of edges as accepted by graph.create_graph
+        [workers]: size of the worker pool
+        [use_processes]: run the queries in a process pool (each worker
+                         loads its own copy of the graph) or else in
+                         a thread pool sharing one graph
+        [max_pending]: limit of queries in flight
+        [deadline]: default and longest deadline in seconds of a query
+        '''
+        self._edges = edges
+        self._is_directed = is_directed
+        self._host = host
+        self.port = port
+        self._workers = workers
+        self._use_processes = use_processes
+        self._max_pending = max_pending
+        self._deadline = deadline
+        self._executor = None
+        self._server = None
+        self._slots = None
+        self._clients = set()
+
+    async def start(self):
+        '''
+        Start the worker pool and listen for connections.
+        If port was 0, [port] holds the port chosen by the system.
+        '''
+        if self._use_processes:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._workers,
+                initializer=_load_graph,
+                initargs=(self._edges, self._is_directed))
+        else:
+            # threads share the graph of this process
+            _load_graph(self._edges, self._is_directed)
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._workers)
+        self._slots = asyncio.Semaphore(self._max_pending)
+        self._server = await asyncio.start_server(self._handle_client,
+                                                  self._host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        for client in list(self._clients):
+            client.cancel()
+        if self._clients:
+            await asyncio.gather(*self._clients, return_exceptions=True)
+        await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _handle_client(self, reader, writer):
+        handler = asyncio.current_task()
+        self._clients.add(handler)
+        write_lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                # wait for a free slot before reading the next request
+                await self._slots.acquire()
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    line = b''
+                if not line:
+                    self._slots.release()
+                    break
+                task = asyncio.ensure_future(
+                    self._serve_request(line, writer, write_lock))
+                pending.add(task)
+                # the task releases the slot
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except asyncio.CancelledError:
+            # server is closing
+            for task in pending:
+                task.cancel()
+        finally:
+            self._clients.discard(handler)
+            writer.close()
+
+    def _deadline_of(self, request):
+        deadline = request.get('deadline', self._deadline)
+        if isinstance(deadline, bool) or \
+                not isinstance(deadline, (int, float)):
+            raise Exception('Invalid deadline: ' + str(deadline))
+        return min(deadline, self._deadline)
+
+    def _release_slot(self, loop, query):
+        # called by the worker pool once the query ends
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:
+            # the event loop is closed
+            pass
+
+    async def _serve_request(self, line, writer, write_lock):
+        request_id = None
+        release = True
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = {'id': request_id, 'ok': True}
+            if request.get('op') == 'ping':
+                response['result'] = 'pong'
+            else:
+                deadline = self._deadline_of(request)
+                loop = asyncio.get_running_loop()
+                query = self._executor.submit(_run_query, request)
+                # the slot is released when the query ends in the worker,
+                # not when its deadline is exceeded
+                release = False
+                query.add_done_callback(
+                    functools.partial(self._release_slot, loop))
+                response['result'] = await asyncio.wait_for(
+                    asyncio.wrap_future(query), deadline)
+        except asyncio.TimeoutError:
+            # a query already running in a worker can not be interrupted,
+            # its result is dropped
+            response = {'id': request_id, 'ok': False,
+                        'error': 'deadline exceeded'}
+        except Exception as e:
+            response = {'id': request_id, 'ok': False, 'error': str(e)}
+        finally:
+            if release:
+                self._slots.release()
+
+        async with write_lock:
+            try:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Serve shortest-path and traversal queries on a graph.')
+    parser.add_argument('edges',
+                        help='json file with a list of [u, v] or [u, v, w]')
+    parser.add_argument('--directed', action='store_true')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads', action='store_true',
+                        help='use a thread pool instead of a process pool')
+    parser.add_argument('--max-pending', type=int, default=64)
+    parser.add_argument('--deadline', type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.edges) as f:
+        edges = json.load(f)
+
+    async def main():
+        server = QueryServer(edges, is_directed=args.directed,
+                             host=args.host, port=args.port,
+                             workers=args.workers,
+                             use_processes=not args.threads,
+                             max_pending=args.max_pending,
+                             deadline=args.deadline)
+        await server.start()
+        print('Serving on ' + args.host + ':' + str(server.port))
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass